@@ -2,11 +2,46 @@ import asyncio
 import aiohttp
 import time
 import logging
-from datetime import datetime
+from pathlib import Path
 from typing import List, Dict, Tuple
-from urllib.parse import urljoin, urlparse
-from models import IPTVChannel
+from urllib.parse import urljoin
+from models import IPTVChannel, CheckStats
 from progress import ProcessProgressTracker
+from resolver import OptimisticResolver
+
+PROBE_READ_SIZE = 1024
+PROBE_RANGE_HEADERS = {'Range': f'bytes=0-{PROBE_READ_SIZE - 1}'}
+HLS_HEADER_SIZE = 16
+HLS_HEADER_RANGE_HEADERS = {'Range': f'bytes=0-{HLS_HEADER_SIZE - 1}'}
+MAX_HLS_DEPTH = 2
+
+def _playlist_base_url(url: str) -> str:
+    path = url.split('#', 1)[0].split('?', 1)[0]
+    if path.count('/') < 3:
+        return path + '/'
+    return path.rsplit('/', 1)[0] + '/'
+
+def _channel_host(channel: IPTVChannel) -> str:
+    parts = channel.url.split('/', 3)
+    return parts[2] if len(parts) > 2 else ''
+
+def _host_schedule(channels: List[IPTVChannel], run_size: int) -> List[IPTVChannel]:
+    by_host: Dict[str, List[IPTVChannel]] = {}
+    for channel in channels:
+        by_host.setdefault(_channel_host(channel), []).append(channel)
+    if run_size <= 0:
+        return [channel for group in by_host.values() for channel in group]
+    schedule = []
+    groups = list(by_host.values())
+    for start in range(0, max(map(len, groups), default=0), run_size):
+        for group in groups:
+            schedule.extend(group[start:start + run_size])
+    return schedule
+
+def _resolve_playlist_url(base_url: str, playlist_url: str, ref: str) -> str:
+    if ref.startswith(('/', '.', '?', '#')) or ':' in ref:
+        return urljoin(playlist_url, ref)
+    return base_url + ref
 
 class StreamChecker:
     def __init__(self, config: Dict):
@@ -15,46 +50,59 @@ class StreamChecker:
         self.max_concurrent = config.get("max_concurrent", 50)
         self.check_duration = config.get("check_duration", 3)
         self.user_agent = config.get("user_agent")
+        self.limit_per_host = config.get("tcp_connector", {}).get("limit_per_host", 20)
         self.session = None
+        self.resolver = None
         self.progress_tracker = None
+        self.stats = CheckStats()
+        self._stream_checks = (self._check_hls_stream, self._check_http_stream, self._check_generic_stream)
 
     async def __aenter__(self):
         tcp_config = self.config.get("tcp_connector", {})
         timeout_config = self.config.get("client_timeout", {})
+        use_dns_cache = tcp_config.get("use_dns_cache", True)
+        if use_dns_cache:
+            log_dir = Path(self.config.get("log_file", "iptv_checker.log")).parent
+            self.resolver = OptimisticResolver(
+                ttl=tcp_config.get("ttl_dns_cache", 300),
+                stale_ttl=tcp_config.get("dns_stale_ttl", 86400),
+                cache_file=str(log_dir / f"{self.config.get('output_prefix', 'checked')}_dns_cache.json")
+            )
         connector = aiohttp.TCPConnector(
-            limit=tcp_config.get("limit", 50),
-            limit_per_host=tcp_config.get("limit_per_host", 20),
-            ttl_dns_cache=tcp_config.get("ttl_dns_cache", 300),
-            use_dns_cache=tcp_config.get("use_dns_cache", True),
+            limit=max(tcp_config.get("limit", 50), self.max_concurrent),
+            limit_per_host=self.limit_per_host,
+            use_dns_cache=False,
+            resolver=self.resolver,
         )
         timeout = aiohttp.ClientTimeout(
             total=timeout_config.get("total", self.timeout),
             connect=timeout_config.get("connect", 5),
             sock_read=timeout_config.get("sock_read", self.timeout)
         )
+        headers = {'Accept-Encoding': 'identity'}
+        if self.user_agent:
+            headers['User-Agent'] = self.user_agent
         self.session = aiohttp.ClientSession(
             connector=connector,
             timeout=timeout,
-            headers={'User-Agent': self.user_agent} if self.user_agent else None
+            headers=headers
         )
         return self
 
     async def __aexit__(self, exc_type, exc_val, exc_tb):
         if self.session:
             await self.session.close()
+        if self.resolver:
+            await self.resolver.close()
 
     async def check_stream(self, channel: IPTVChannel) -> bool:
-        start_time = time.time()
+        start_time = time.monotonic()
         try:
-            if self._is_hls_stream(channel.url):
-                result = await self._check_hls_stream(channel)
-            elif self._is_http_stream(channel.url):
-                result = await self._check_http_stream(channel)
-            else:
-                result = await self._check_generic_stream(channel)
-            channel.response_time = time.time() - start_time
+            result = await self._stream_checks[channel.kind](channel)
+            channel.response_time = time.monotonic() - start_time
             channel.is_working = result
-            channel.check_time = datetime.now()
+            channel.check_time = time.time()
+            self.stats.record(channel)
             if self.progress_tracker:
                 self.progress_tracker.update(result)
             if result:
@@ -63,24 +111,27 @@ class StreamChecker:
                 logging.warning(f"✗ {channel.name} - FAILED: {channel.error_message}")
             return result
         except Exception as e:
-            channel.response_time = time.time() - start_time
+            channel.response_time = time.monotonic() - start_time
             channel.error_message = str(e)
             channel.is_working = False
-            channel.check_time = datetime.now()
+            channel.check_time = time.time()
+            self.stats.record(channel)
             if self.progress_tracker:
                 self.progress_tracker.update(False)
             logging.warning(f"✗ {channel.name} - ERROR: {e}")
             return False
 
-    def _is_hls_stream(self, url: str) -> bool:
-        return url.endswith('.m3u8') or 'm3u8' in url.lower()
-
-    def _is_http_stream(self, url: str) -> bool:
-        return url.startswith(('http://', 'https://'))
-
     async def _check_hls_stream(self, channel: IPTVChannel) -> bool:
+        return await self._check_hls_url(channel.url, channel)
+
+    async def _check_hls_url(self, url: str, channel: IPTVChannel, depth: int = 0) -> bool:
+        if depth >= MAX_HLS_DEPTH:
+            channel.error_message = "Too many nested playlists"
+            return False
+        if self.check_duration <= 0:
+            return await self._check_hls_header(url, channel)
         try:
-            async with self.session.get(channel.url) as response:
+            async with self.session.get(url) as response:
                 if response.status != 200:
                     channel.error_message = f"HTTP {response.status}"
                     return False
@@ -89,9 +140,9 @@ class StreamChecker:
                     channel.error_message = "Invalid HLS playlist"
                     return False
                 if '#EXT-X-STREAM-INF:' in content:
-                    return await self._check_hls_variant(channel, content)
+                    return await self._check_hls_variant(url, channel, content, depth)
                 if '#EXTINF:' in content:
-                    return await self._check_hls_segments(channel, content)
+                    return await self._check_hls_segments(url, channel, content)
                 return True
         except asyncio.TimeoutError:
             channel.error_message = "Timeout"
@@ -100,7 +151,25 @@ class StreamChecker:
             channel.error_message = str(e)
             return False
 
-    async def _check_hls_variant(self, channel: IPTVChannel, playlist_content: str) -> bool:
+    async def _check_hls_header(self, url: str, channel: IPTVChannel) -> bool:
+        try:
+            async with self.session.get(url, headers=HLS_HEADER_RANGE_HEADERS) as response:
+                if response.status not in (200, 206):
+                    channel.error_message = f"HTTP {response.status}"
+                    return False
+                data = await response.content.read(HLS_HEADER_SIZE)
+                if not data.lstrip().startswith(b'#EXTM3U'):
+                    channel.error_message = "Invalid HLS playlist"
+                    return False
+                return True
+        except asyncio.TimeoutError:
+            channel.error_message = "Timeout"
+            return False
+        except Exception as e:
+            channel.error_message = str(e)
+            return False
+
+    async def _check_hls_variant(self, url: str, channel: IPTVChannel, playlist_content: str, depth: int = 0) -> bool:
         lines = playlist_content.split('\n')
         for i, line in enumerate(lines):
             if line.startswith('#EXT-X-STREAM-INF:'):
@@ -108,21 +177,23 @@ class StreamChecker:
                     variant_url = lines[i + 1].strip()
                     if variant_url:
                         if not variant_url.startswith('http'):
-                            variant_url = urljoin(channel.url, variant_url)
-                        temp_channel = IPTVChannel(channel.extinf_line, variant_url)
-                        temp_channel.name = channel.name
-                        return await self._check_hls_stream(temp_channel)
+                            variant_url = urljoin(url, variant_url)
+                        if variant_url == url:
+                            channel.error_message = "Variant playlist references itself"
+                            return False
+                        return await self._check_hls_url(variant_url, channel, depth + 1)
         channel.error_message = "No valid variant found"
         return False
 
-    async def _check_hls_segments(self, channel: IPTVChannel, playlist_content: str) -> bool:
+    async def _check_hls_segments(self, url: str, channel: IPTVChannel, playlist_content: str) -> bool:
         lines = playlist_content.split('\n')
+        base_url = _playlist_base_url(url)
         segments = []
         for line in lines:
             line = line.strip()
             if line and not line.startswith('#'):
-                if not line.startswith('http'):
-                    line = urljoin(channel.url, line)
+                if not line.startswith(('http://', 'https://')):
+                    line = _resolve_playlist_url(base_url, url, line)
                 segments.append(line)
                 if len(segments) >= 2:
                     break
@@ -136,7 +207,7 @@ class StreamChecker:
             try:
                 async with self.session.get(segments[0]) as response:
                     if response.status == 200:
-                        await response.content.read(1024)
+                        await self._read_probe(response)
                         return True
             except Exception:
                 pass
@@ -144,6 +215,26 @@ class StreamChecker:
         return False
 
     async def _check_http_stream(self, channel: IPTVChannel) -> bool:
+        try:
+            async with self.session.get(channel.url, headers=PROBE_RANGE_HEADERS) as response:
+                if response.status in (200, 206):
+                    if await self._read_probe(response):
+                        return True
+                    channel.error_message = "Empty response"
+                    return False
+                elif response.status == 416:
+                    return await self._check_with_head(channel)
+                else:
+                    channel.error_message = f"HTTP {response.status}"
+                    return False
+        except asyncio.TimeoutError:
+            channel.error_message = "Timeout"
+            return False
+        except Exception as e:
+            channel.error_message = str(e)
+            return False
+
+    async def _check_with_head(self, channel: IPTVChannel) -> bool:
         try:
             async with self.session.head(channel.url) as response:
                 if response.status == 200:
@@ -165,8 +256,7 @@ class StreamChecker:
                 if response.status != 200:
                     channel.error_message = f"HTTP {response.status}"
                     return False
-                data = await response.content.read(1024)
-                return len(data) > 0
+                return await self._read_probe(response)
         except asyncio.TimeoutError:
             channel.error_message = "Timeout"
             return False
@@ -174,24 +264,30 @@ class StreamChecker:
             channel.error_message = str(e)
             return False
 
+    async def _read_probe(self, response: aiohttp.ClientResponse) -> bool:
+        data = await response.content.read(PROBE_READ_SIZE)
+        return len(data) > 0
+
     async def _check_generic_stream(self, channel: IPTVChannel) -> bool:
         return await self._check_http_stream(channel)
 
     async def check_all_streams(self, channels: List[IPTVChannel]) -> Tuple[List[IPTVChannel], List[IPTVChannel]]:
         start_time = time.time()
         logging.info(f"Starting check of {len(channels)} channels...")
-        semaphore = asyncio.Semaphore(self.max_concurrent)
-        async def check_with_semaphore(channel):
-            async with semaphore:
-                return await self.check_stream(channel)
-        tasks = [check_with_semaphore(channel) for channel in channels]
         try:
-            await asyncio.gather(*tasks, return_exceptions=True)
+            schedule = iter(_host_schedule(channels, self.limit_per_host))
+            async def check_worker():
+                for channel in schedule:
+                    await self.check_stream(channel)
+            workers = [check_worker() for _ in range(min(self.max_concurrent, len(channels)))]
+            await asyncio.gather(*workers, return_exceptions=True)
         finally:
             if hasattr(self.progress_tracker, 'close'):
                 self.progress_tracker.close()
-        working_channels = [ch for ch in channels if ch.is_working]
-        broken_channels = [ch for ch in channels if not ch.is_working]
+        working_channels = []
+        broken_channels = []
+        for channel in channels:
+            (working_channels if channel.is_working else broken_channels).append(channel)
         elapsed_time = self.progress_tracker.get_elapsed_time() if hasattr(self.progress_tracker, 'get_elapsed_time') else time.time() - start_time
         logging.info(f"Check completed in {elapsed_time:.2f}s! Working: {len(working_channels)}, Broken: {len(broken_channels)}")
         return working_channels, broken_channels
\ No newline at end of file
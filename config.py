@@ -12,18 +12,21 @@ ENHANCED_DEFAULT_CONFIG = {
     "log_to_file": "True",
     "log_file": "LOG/checker.log",
     "show_progress_bar": "True",
+    "progress_refresh_interval": 0.25,
     "show_errors_in_summary": "True",
     "max_errors_to_show": 10,
     "encodings_to_try": ["utf-8", "cp1251", "latin-1", "iso-8859-1"],
     "resume": {
         "enabled": "True",
         "check_channel_count": "True",
+        "min_output_size_ratio": 0,
         "auto_cleanup_incomplete": "False"
     },
     "tcp_connector": {
         "limit": 50,
         "limit_per_host": 20,
         "ttl_dns_cache": 300,
+        "dns_stale_ttl": 86400,
         "use_dns_cache": "True"
     },
     "client_timeout": {
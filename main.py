@@ -1,4 +1,3 @@
-import asyncio
 import argparse
 import time
 import sys
@@ -9,30 +8,40 @@ from typing import List
 from config import load_config
 from parser import M3UParser
 from checker import StreamChecker
-from utils import setup_logging, print_summary
+from utils import setup_logging, print_summary, run_async
 from progress import MultiProcessProgressManager, ProcessProgressTracker
 from resume import ResumeManager
 
+_WORKER_CONFIG = None
+_WORKER_SHARED_STATUS = None
+
+def _worker_init(cfg: dict, shared_status = None):
+    global _WORKER_CONFIG, _WORKER_SHARED_STATUS
+    _WORKER_CONFIG = cfg
+    _WORKER_SHARED_STATUS = shared_status
+    setup_logging(cfg)
+
 def process_single_file_sync(args_tuple) -> dict:
-    file_path, config, working_dir, broken_dir, process_id, shared_status = args_tuple
-    return asyncio.run(process_single_file_async(file_path, config, working_dir, broken_dir, process_id, shared_status))
+    file_path, working_dir, broken_dir, process_id = args_tuple
+    return run_async(process_single_file_async(file_path, _WORKER_CONFIG, working_dir, broken_dir, process_id, _WORKER_SHARED_STATUS))
 
 async def process_single_file_async(file_path: Path, config: dict, working_dir: Path = None, broken_dir: Path = None, process_id: int = None, shared_status = None) -> dict:
     try:
         channels = M3UParser.parse(str(file_path), config)
         if not channels:
-            if shared_status and process_id is not None:
+            if shared_status is not None and process_id is not None:
                 tracker = ProcessProgressTracker(process_id, shared_status, 0)
                 tracker.complete(False)
             return {"file": file_path.name, "error": "No channels found", "working": 0, "broken": 0}
         start_time = time.time()
         tracker = None
-        if shared_status and process_id is not None:
+        if shared_status is not None and process_id is not None:
             tracker = ProcessProgressTracker(process_id, shared_status, len(channels))
         async with StreamChecker(config) as checker:
             if tracker:
                 checker.progress_tracker = tracker
             working_channels, broken_channels = await checker.check_all_streams(channels)
+            stats = checker.stats
         if tracker:
             tracker.complete(True)
         elapsed_time = time.time() - start_time
@@ -49,14 +58,15 @@ async def process_single_file_async(file_path: Path, config: dict, working_dir:
             M3UParser.save_playlist(broken_channels, str(broken_file))
         return {
             "file": file_path.name,
-            "working": len(working_channels),
-            "broken": len(broken_channels),
+            "working": stats.working,
+            "broken": stats.broken,
+            "stats": stats,
             "elapsed": elapsed_time,
             "working_file": str(working_file) if working_file else None,
             "broken_file": str(broken_file) if broken_file else None
         }
     except Exception as e:
-        if shared_status and process_id is not None:
+        if shared_status is not None and process_id is not None:
             tracker = ProcessProgressTracker(process_id, shared_status, 0)
             tracker.complete(False)
         return {"file": file_path.name, "error": str(e), "working": 0, "broken": 0}
@@ -141,7 +151,8 @@ async def main():
         resume_manager.print_resume_summary(resume_info, [])
         return
     if args.cleanup_incomplete:
-        cleaned_files = resume_manager.cleanup_incomplete_files(files_to_process, working_dir, broken_dir)
+        resume_info = resume_manager.get_resume_info(files_to_process, working_dir, broken_dir)
+        cleaned_files = resume_manager.cleanup_incomplete_files(resume_info['incomplete_details'], working_dir, broken_dir)
         if cleaned_files:
             print(f"Cleaned up {len(cleaned_files)} incomplete files:")
             for file in cleaned_files:
@@ -150,7 +161,7 @@ async def main():
             print("No incomplete files found to clean up")
         return
     original_files_count = len(files_to_process)
-    files_to_process, skipped_files = resume_manager.filter_files_for_processing(
+    files_to_process, skipped_files, resume_info = resume_manager.analyze(
         files_to_process, working_dir, broken_dir, args.force
     )
     if not files_to_process:
@@ -161,8 +172,6 @@ async def main():
                 print(f"  ✅ {skipped['file']} - {skipped['reason']}")
         return
     if skipped_files:
-        all_files = files_to_process + [Path(f['path']) for f in skipped_files]
-        resume_info = resume_manager.get_resume_info(all_files, working_dir, broken_dir)
         resume_manager.print_resume_summary(resume_info, skipped_files)
     print(f"\nProcessing {len(files_to_process)} file(s):")
     for f in files_to_process:
@@ -173,21 +182,27 @@ async def main():
     if len(files_to_process) == 1:
         result = await process_single_file_async(files_to_process[0], config, working_dir, broken_dir)
         results = [result]
+        if 'stats' in result:
+            print_summary(result['stats'], result['elapsed'], config)
     else:
         max_processes = min(args.processes, len(files_to_process), mp.cpu_count())
         progress_manager = MultiProcessProgressManager(
             files_to_process, 
-            config.get('show_progress_bar', True) and not args.no_progress
+            config.get('show_progress_bar', True) and not args.no_progress,
+            config
         )
         try:
             progress_manager.start_display()
             print(f"Processing with {max_processes} parallel processes...\n")
-            with mp.Pool(max_processes) as pool:
+            with mp.get_context('spawn').Pool(max_processes, initializer=_worker_init, initargs=(config, progress_manager.shared_status)) as pool:
                 process_args = [
-                    (f, config, working_dir, broken_dir, i, progress_manager.shared_status) 
+                    (f, working_dir, broken_dir, i)
                     for i, f in enumerate(files_to_process)
                 ]
-                results = pool.map(process_single_file_sync, process_args)
+                process_args.sort(key=lambda args: args[0].stat().st_size, reverse=True)
+                results = list(pool.imap_unordered(process_single_file_sync, process_args, chunksize=1))
+            file_order = {f.name: i for i, f in enumerate(files_to_process)}
+            results.sort(key=lambda result: file_order.get(result['file'], 0))
         finally:
             progress_manager.close()
     total_elapsed = time.time() - start_time
@@ -224,7 +239,7 @@ async def main():
 
 if __name__ == "__main__":
     try:
-        asyncio.run(main())
+        run_async(main())
     except KeyboardInterrupt:
         print("\nProgram interrupted")
         sys.exit(1)
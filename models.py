@@ -1,19 +1,43 @@
-import re
-from datetime import datetime
+from collections import Counter
+from dataclasses import dataclass, field
 from typing import List
+STREAM_HLS = 0
+STREAM_HTTP = 1
+STREAM_OTHER = 2
 class IPTVChannel:
+    __slots__ = ('extinf_line', 'url', 'name', 'kind', 'is_working', 'response_time', 'error_message', 'check_time')
     def __init__(self, extinf_line: str, url: str):
         self.extinf_line = extinf_line.strip()
         self.url = url.strip()
         self.name = self._extract_name()
+        self.kind = self._detect_kind()
         self.is_working = False
         self.response_time = 0
         self.error_message = ""
         self.check_time = None
     def _extract_name(self) -> str:
-        match = re.search(r',([^,]+)$', self.extinf_line)
-        if match:
-            return match.group(1).strip()
-        return "Unknown Channel"
+        _, comma, name = self.extinf_line.rpartition(',')
+        name = name.strip() if comma else ""
+        return name or "Unknown Channel"
+    def _detect_kind(self) -> int:
+        if self.url.endswith('.m3u8') or 'm3u8' in self.url.lower():
+            return STREAM_HLS
+        if self.url.startswith(('http://', 'https://')):
+            return STREAM_HTTP
+        return STREAM_OTHER
     def __str__(self):
-        return f"{self.name} - {'✓' if self.is_working else '✗'}"
\ No newline at end of file
+        return f"{self.name} - {'✓' if self.is_working else '✗'}"
+@dataclass
+class CheckStats:
+    working: int = 0
+    broken: int = 0
+    errors: Counter = field(default_factory=Counter)
+    @property
+    def total(self) -> int:
+        return self.working + self.broken
+    def record(self, channel: IPTVChannel):
+        if channel.is_working:
+            self.working += 1
+        else:
+            self.broken += 1
+            self.errors[channel.error_message or "Unknown error"] += 1
\ No newline at end of file
@@ -1,7 +1,13 @@
 from typing import List, Dict
+import codecs
 import logging
+import re
 from pathlib import Path
 from models import IPTVChannel
+ENCODING_SNIFF_SIZE = 65536
+COUNT_BLOCK_SIZE = 1024 * 1024
+EXTINF_MARKER = b'\n#EXTINF:'
+M3U_ENTRY_PATTERN = re.compile(r'(?:^|(?<=\r))[^\S\r\n]*(#EXTINF:[^\r\n]*|[^#\s][^\r\n]*)', re.MULTILINE)
 class M3UParser:
     @staticmethod
     def parse(file_path: str, config: Dict) -> List[IPTVChannel]:
@@ -9,42 +15,63 @@ class M3UParser:
         encodings = config.get("encodings_to_try", ["utf-8", "cp1251", "latin-1"])
         if not Path(file_path).exists():
             raise FileNotFoundError(f"File {file_path} not found")
+        raw = Path(file_path).read_bytes()
+        head = raw[:ENCODING_SNIFF_SIZE]
         content = None
-        used_encoding = None
-        for encoding in encodings:
+        for encoding in M3UParser._candidate_encodings(head, encodings):
             try:
-                with open(file_path, 'r', encoding=encoding) as f:
-                    content = f.readlines()
-                used_encoding = encoding
+                if len(raw) > len(head):
+                    codecs.getincrementaldecoder(encoding)().decode(head)
+                content = raw.decode(encoding)
                 logging.info(f"Successfully decoded file using {encoding} encoding")
                 break
             except UnicodeDecodeError:
                 continue
             except Exception as e:
-                logging.error(f"Error reading file with {encoding}: {e}")
+                logging.error(f"Error decoding file with {encoding}: {e}")
                 continue
         if content is None or not content:
             raise Exception(f"File {file_path} is empty or could not be decoded")
         extinf_line = None
-        line_number = 0
-        for line in content:
-            line_number += 1
-            line = line.strip()
-            if not line:
-                continue
+        line_number = 1
+        line_pos = 0
+        for match in M3U_ENTRY_PATTERN.finditer(content):
+            line = match.group(1).rstrip()
             if line.startswith('#EXTINF:'):
                 extinf_line = line
-            elif line and not line.startswith('#') and extinf_line:
-                if M3UParser._is_valid_url(line):
-                    channels.append(IPTVChannel(extinf_line, line))
-                else:
-                    logging.warning(f"Invalid URL on line {line_number}: {line}")
+                continue
+            if extinf_line and M3UParser._is_valid_url(line):
+                channels.append(IPTVChannel(extinf_line, line))
+                extinf_line = None
+                continue
+            line_number += content.count('\n', line_pos, match.start())
+            line_pos = match.start()
+            if extinf_line:
+                logging.warning(f"Invalid URL on line {line_number}: {line}")
                 extinf_line = None
-            elif line and not line.startswith('#') and not extinf_line:
+            else:
                 logging.warning(f"URL without EXTINF on line {line_number}: {line}")
         logging.info(f"Found {len(channels)} valid channels")
         return channels
     @staticmethod
+    def count_channels(file_path: str) -> int:
+        count = 0
+        tail = b'\n'
+        with open(file_path, 'rb') as f:
+            while True:
+                block = f.read(COUNT_BLOCK_SIZE)
+                if not block:
+                    break
+                data = tail + block
+                count += data.count(EXTINF_MARKER)
+                tail = data[1 - len(EXTINF_MARKER):]
+        return count
+    @staticmethod
+    def _candidate_encodings(head: bytes, encodings: List[str]) -> List[str]:
+        if head.startswith(codecs.BOM_UTF8):
+            return ['utf-8-sig'] + list(encodings)
+        return list(encodings)
+    @staticmethod
     def _is_valid_url(url: str) -> bool:
         if not url or len(url.strip()) == 0:
             return False
@@ -53,11 +80,10 @@ class M3UParser:
     @staticmethod
     def save_playlist(channels: List[IPTVChannel], file_path: str, header: str = "#EXTM3U"):
         try:
+            chunks = [header, '\n']
+            chunks.extend(f"{channel.extinf_line}\n{channel.url}\n" for channel in channels)
             with open(file_path, 'w', encoding='utf-8') as f:
-                f.write(header + '\n')
-                for channel in channels:
-                    f.write(channel.extinf_line + '\n')
-                    f.write(channel.url + '\n')
+                f.write(''.join(chunks))
             logging.info(f"Playlist saved to {file_path} with {len(channels)} channels")
         except Exception as e:
             logging.error(f"Error saving playlist to {file_path}: {e}")
@@ -1,7 +1,9 @@
+import ctypes
+import os
 import time
 import threading
 import multiprocessing as mp
-from typing import Dict, List, Optional
+from typing import Dict, List, Optional, Tuple
 from dataclasses import dataclass
 from pathlib import Path
 try:
@@ -20,17 +22,83 @@ class ProcessStatus:
     elapsed: float = 0
     status: str = "waiting"
 
+STATUS_CODES = {'waiting': 0, 'processing': 1, 'completed': 2, 'error': 3}
+STATUS_NAMES = tuple(STATUS_CODES)
+
+COMPLETED_MASK = (1 << 24) - 1
+WORKING_MASK = (1 << 20) - 1
+BROKEN_MASK = (1 << 20) - 1
+COUNTER_FIELDS = ('completed', 'working', 'broken')
+
+def pack_counters(completed: int, working: int, broken: int) -> int:
+    return (completed & COMPLETED_MASK) | ((working & WORKING_MASK) << 24) | ((broken & BROKEN_MASK) << 44)
+
+def unpack_counters(packed: int) -> Tuple[int, int, int]:
+    return packed & COMPLETED_MASK, (packed >> 24) & WORKING_MASK, (packed >> 44) & BROKEN_MASK
+
+class ProcessStatusRecord(ctypes.Structure):
+    _fields_ = [
+        ('counters', ctypes.c_uint64),
+        ('total_channels', ctypes.c_int32),
+        ('elapsed', ctypes.c_float),
+        ('status', ctypes.c_int8),
+    ]
+
+class SharedProgressState:
+    def __init__(self, records: ctypes.Array):
+        self.records = records
+        self.size = len(records)
+
+    @classmethod
+    def create(cls, size: int) -> 'SharedProgressState':
+        return cls(mp.RawArray(ProcessStatusRecord, size))
+
+    def get(self, process_id: int) -> Dict:
+        return self._as_dict(self.records[process_id])
+
+    def snapshot(self) -> List[Dict]:
+        records = (ProcessStatusRecord * self.size).from_buffer_copy(self.records)
+        return [self._as_dict(record) for record in records]
+
+    @staticmethod
+    def _as_dict(record: ProcessStatusRecord) -> Dict:
+        completed, working, broken = unpack_counters(record.counters)
+        return {
+            'total_channels': record.total_channels,
+            'completed': completed,
+            'working': working,
+            'broken': broken,
+            'elapsed': record.elapsed,
+            'status': STATUS_NAMES[record.status]
+        }
+
+    def update(self, process_id: int, **kwargs):
+        record = self.records[process_id]
+        counters = dict(zip(COUNTER_FIELDS, unpack_counters(record.counters)))
+        for key, value in kwargs.items():
+            if key in counters:
+                counters[key] = value
+            else:
+                setattr(record, key, STATUS_CODES[value] if key == 'status' else value)
+        record.counters = pack_counters(**counters)
+
+def get_refresh_interval(config: Optional[Dict] = None) -> float:
+    return float(os.environ.get('TQDM_MININTERVAL', (config or {}).get('progress_refresh_interval', 0.25)))
+
 class ProgressTracker:
-    def __init__(self, total: int, show_progress: bool = True):
+    def __init__(self, total: int, show_progress: bool = True, config: Optional[Dict] = None):
         self.total = total
         self.completed = 0
         self.working = 0
         self.broken = 0
         self.start_time = time.time()
         self.show_progress = show_progress and TQDM_AVAILABLE
+        self.refresh_interval = get_refresh_interval(config)
         self.pbar = None
+        self._pending = 0
+        self._last_flush = time.monotonic()
         if self.show_progress:
-            self.pbar = tqdm(total=total, desc="Checking channels", unit="ch")
+            self.pbar = tqdm(total=total, desc="Checking channels", unit="ch", mininterval=self.refresh_interval, miniters=max(1, total // 1000))
     
     def update(self, is_working: bool):
         self.completed += 1
@@ -39,39 +107,40 @@ class ProgressTracker:
         else:
             self.broken += 1
         if self.pbar:
-            self.pbar.update(1)
-            self.pbar.set_postfix(working=self.working, broken=self.broken)
+            self._pending += 1
+            if self._pending >= 16 or time.monotonic() - self._last_flush > self.refresh_interval:
+                self._flush()
     
     def close(self):
         if self.pbar:
+            self._flush()
             self.pbar.close()
     
+    def _flush(self):
+        if self._pending:
+            self.pbar.update(self._pending)
+            self.pbar.set_postfix(working=self.working, broken=self.broken, refresh=False)
+            self._pending = 0
+        self._last_flush = time.monotonic()
+    
     def get_elapsed_time(self) -> float:
         return time.time() - self.start_time
 
 class MultiProcessProgressManager:
-    def __init__(self, file_paths: List[Path], show_progress: bool = True):
+    def __init__(self, file_paths: List[Path], show_progress: bool = True, config: Optional[Dict] = None):
         self.file_paths = file_paths
         self.show_progress = show_progress and TQDM_AVAILABLE
-        self.manager = mp.Manager()
-        self.shared_status = self.manager.dict()
+        self.shared_state = SharedProgressState.create(len(file_paths))
+        self.shared_status = self.shared_state.records
         self.lock = threading.Lock()
         self.progress_bars = {}
+        self._last_render: Dict[int, Tuple] = {}
         self.main_bar = None
         self.total_files = len(file_paths)
         self.completed_files = 0
         self.display_thread = None
-        self.should_stop = False
-        for i, file_path in enumerate(file_paths):
-            self.shared_status[i] = {
-                'file_name': file_path.name,
-                'total_channels': 0,
-                'completed': 0,
-                'working': 0,
-                'broken': 0,
-                'elapsed': 0,
-                'status': 'waiting'
-            }
+        self.refresh_interval = get_refresh_interval(config)
+        self._stop_event = threading.Event()
 
     def start_display(self):
         if not self.show_progress:
@@ -81,6 +150,7 @@ class MultiProcessProgressManager:
             desc="Overall Progress",
             position=0,
             leave=True,
+            mininterval=self.refresh_interval,
             bar_format="{l_bar}{bar}| {n_fmt}/{total_fmt} files [{elapsed}<{remaining}]"
         )
         for i in range(len(self.file_paths)):
@@ -91,63 +161,66 @@ class MultiProcessProgressManager:
                 desc=f"File {i+1}: {display_name}",
                 position=i+1,
                 leave=False,
+                mininterval=self.refresh_interval,
                 bar_format="{l_bar}{bar}| {postfix}"
             )
-        self.display_thread = threading.Thread(target=self._update_display, daemon=True)
+        self.display_thread = threading.Thread(target=self._update_display)
         self.display_thread.start()
 
     def _update_display(self):
-        while not self.should_stop and self.completed_files < self.total_files:
+        while True:
+            stopping = self._stop_event.is_set()
             completed_count = 0
+            snapshot = self.shared_state.snapshot()
             for process_id in range(len(self.file_paths)):
-                if process_id not in self.shared_status:
-                    continue
-                status = self.shared_status.get(process_id, {})
+                status = snapshot[process_id]
                 if process_id not in self.progress_bars:
                     continue
                 bar = self.progress_bars[process_id]
+                if status.get('status') in ('completed', 'error'):
+                    completed_count += 1
+                key = (status.get('status'), status.get('completed'), status.get('working'), status.get('broken'))
+                if self._last_render.get(process_id) == key:
+                    continue
+                self._last_render[process_id] = key
                 if status.get('status') == 'completed':
                     if bar.n < bar.total:
                         bar.n = bar.total
-                        bar.set_postfix_str(f"✅ {status.get('working', 0)}W/{status.get('broken', 0)}B ({status.get('elapsed', 0):.1f}s)")
+                        bar.set_postfix_str(f"✅ {status.get('working', 0)}W/{status.get('broken', 0)}B ({status.get('elapsed', 0):.1f}s)", refresh=False)
                         bar.refresh()
-                    completed_count += 1
                 elif status.get('status') == 'processing':
                     total_channels = status.get('total_channels', 0)
                     if total_channels > 0:
                         progress = min(100, int((status.get('completed', 0) / total_channels) * 100))
                         bar.n = progress
-                        bar.set_postfix_str(f"⚡ {status.get('completed', 0)}/{total_channels} ({status.get('working', 0)}W/{status.get('broken', 0)}B)")
+                        bar.set_postfix_str(f"⚡ {status.get('completed', 0)}/{total_channels} ({status.get('working', 0)}W/{status.get('broken', 0)}B)", refresh=False)
                         bar.refresh()
                 elif status.get('status') == 'error':
                     if bar.n < bar.total:
                         bar.n = bar.total
-                        bar.set_postfix_str("❌ Error")
+                        bar.set_postfix_str("❌ Error", refresh=False)
                         bar.refresh()
-                    completed_count += 1
                 elif status.get('status') == 'waiting':
-                    bar.set_postfix_str("⏳ Waiting")
+                    bar.set_postfix_str("⏳ Waiting", refresh=False)
                     bar.refresh()
             if completed_count != self.completed_files:
                 self.completed_files = completed_count
                 if self.main_bar:
                     self.main_bar.n = completed_count
                     self.main_bar.refresh()
-            time.sleep(0.1)
+            if stopping or self.completed_files >= self.total_files:
+                break
+            self._stop_event.wait(self.refresh_interval)
 
     def update_process_status(self, process_id: int, **kwargs):
-        if process_id in self.shared_status:
-            status = dict(self.shared_status[process_id])
-            status.update(kwargs)
-            self.shared_status[process_id] = status
+        self.shared_state.update(process_id, **kwargs)
 
     def close(self):
         if not self.show_progress:
             return
-        self.should_stop = True
-        if self.display_thread and self.display_thread.is_alive():
-            self.display_thread.join(timeout=1.0)
-        time.sleep(0.2)
+        self._stop_event.set()
+        if self.display_thread:
+            self.display_thread.join()
         for bar in self.progress_bars.values():
             if bar:
                 bar.close()
@@ -155,49 +228,48 @@ class MultiProcessProgressManager:
             self.main_bar.close()
 
 class ProcessProgressTracker:
-    def __init__(self, process_id: int, shared_status: Dict, total: int):
+    def __init__(self, process_id: int, shared_status: ctypes.Array, total: int):
         self.process_id = process_id
-        self.shared_status = shared_status
+        self.shared_state = SharedProgressState(shared_status)
+        self.record = shared_status[process_id]
         self.total = total
         self.completed = 0
         self.working = 0
         self.broken = 0
-        self.start_time = time.time()
+        self.start_time = time.monotonic()
+        self._last_elapsed_emit = 0.0
         self._update_status(
             total_channels=total,
             status='processing'
         )
 
     def update(self, is_working: bool):
+        record = self.record
         self.completed += 1
         if is_working:
             self.working += 1
         else:
             self.broken += 1
-        self._update_status(
-            completed=self.completed,
-            working=self.working,
-            broken=self.broken,
-            elapsed=time.time() - self.start_time
-        )
+        record.counters = pack_counters(self.completed, self.working, self.broken)
+        elapsed = time.monotonic() - self.start_time
+        if elapsed - self._last_elapsed_emit >= 0.2:
+            record.elapsed = elapsed
+            self._last_elapsed_emit = elapsed
 
     def complete(self, success: bool = True):
         self._update_status(
             completed=self.total,
             working=self.working,
             broken=self.broken,
-            elapsed=time.time() - self.start_time,
+            elapsed=time.monotonic() - self.start_time,
             status='completed' if success else 'error'
         )
 
     def get_elapsed_time(self) -> float:
-        return time.time() - self.start_time
+        return time.monotonic() - self.start_time
 
     def _update_status(self, **kwargs):
-        if self.process_id in self.shared_status:
-            status = dict(self.shared_status[self.process_id])
-            status.update(kwargs)
-            self.shared_status[self.process_id] = status
+        self.shared_state.update(self.process_id, **kwargs)
 
-def create_process_tracker(process_id: int, shared_status: Dict, total: int) -> ProcessProgressTracker:
+def create_process_tracker(process_id: int, shared_status: ctypes.Array, total: int) -> ProcessProgressTracker:
     return ProcessProgressTracker(process_id, shared_status, total)
\ No newline at end of file
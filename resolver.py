@@ -0,0 +1,101 @@
+import asyncio
+import json
+import logging
+import os
+import socket
+import time
+from pathlib import Path
+from typing import Dict, List, Optional, Set, Tuple
+from aiohttp.abc import AbstractResolver
+from aiohttp.resolver import DefaultResolver
+
+class OptimisticResolver(AbstractResolver):
+    """DNS-резолвер с выдачей устаревших записей (RFC 8767) и фоновым обновлением"""
+
+    def __init__(self, ttl: float = 300, stale_ttl: float = 86400, cache_file: Optional[str] = None):
+        self.ttl = ttl
+        self.stale_ttl = stale_ttl
+        self.cache_file = Path(cache_file) if cache_file else None
+        self._resolver = DefaultResolver()
+        self._cache: Dict[str, Tuple[List[Dict], float]] = {}
+        self._loaded: Set[str] = set()
+        self._refreshing: Dict[str, asyncio.Task] = {}
+        self._load()
+
+    async def resolve(self, host: str, port: int = 0, family: int = socket.AF_INET) -> List[Dict]:
+        key = f"{host}|{port}|{int(family)}"
+        entry = self._cache.get(key)
+        now = time.time()
+        if entry is not None and now <= entry[1]:
+            return entry[0]
+        stale = entry is not None and now <= entry[1] + self.stale_ttl
+        task = self._refreshing.get(key)
+        if task is None:
+            task = asyncio.create_task(self._lookup(key, host, port, family))
+            task.add_done_callback(lambda done: self._refresh_done(key, host, done))
+            self._refreshing[key] = task
+        if stale and key not in self._loaded:
+            return entry[0]
+        try:
+            return await asyncio.shield(task)
+        except Exception:
+            if stale:
+                return entry[0]
+            raise
+
+    async def close(self) -> None:
+        for task in list(self._refreshing.values()):
+            task.cancel()
+        await self._resolver.close()
+        self._save()
+
+    async def _lookup(self, key: str, host: str, port: int, family: int) -> List[Dict]:
+        addrs = await self._resolver.resolve(host, port, family=family)
+        self._cache[key] = ([dict(addr) for addr in addrs], time.time() + self.ttl)
+        self._loaded.discard(key)
+        return addrs
+
+    def _refresh_done(self, key: str, host: str, task: asyncio.Task):
+        self._refreshing.pop(key, None)
+        if not task.cancelled() and task.exception() is not None:
+            logging.debug(f"DNS refresh failed for {host}: {task.exception()}")
+
+    def _read_cache_file(self) -> Dict[str, Tuple[List[Dict], float]]:
+        with open(self.cache_file, 'r', encoding='utf-8') as f:
+            return {key: (addrs, expires_at) for key, (addrs, expires_at) in json.load(f).items()}
+
+    def _load(self):
+        if not self.cache_file or not self.cache_file.exists():
+            return
+        try:
+            now = time.time()
+            for key, (addrs, expires_at) in self._read_cache_file().items():
+                if now <= expires_at + self.stale_ttl:
+                    self._cache[key] = (addrs, expires_at)
+                    self._loaded.add(key)
+            logging.info(f"Loaded {len(self._cache)} DNS entries from {self.cache_file}")
+        except Exception as e:
+            logging.warning(f"Error loading DNS cache {self.cache_file}: {e}")
+
+    def _save(self):
+        if not self.cache_file or not self._cache:
+            return
+        try:
+            self.cache_file.parent.mkdir(parents=True, exist_ok=True)
+            cache = {}
+            if self.cache_file.exists():
+                try:
+                    cache = self._read_cache_file()
+                except Exception as e:
+                    logging.debug(f"Ignoring unreadable DNS cache {self.cache_file}: {e}")
+            now = time.time()
+            cache = {key: entry for key, entry in cache.items() if now <= entry[1] + self.stale_ttl}
+            for key, entry in self._cache.items():
+                if key not in cache or entry[1] > cache[key][1]:
+                    cache[key] = entry
+            tmp_file = self.cache_file.with_name(f"{self.cache_file.name}.{os.getpid()}.tmp")
+            with open(tmp_file, 'w', encoding='utf-8') as f:
+                json.dump(cache, f)
+            os.replace(tmp_file, self.cache_file)
+        except Exception as e:
+            logging.warning(f"Error saving DNS cache {self.cache_file}: {e}")
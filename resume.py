@@ -1,4 +1,6 @@
 import logging
+import os
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 from typing import List, Dict, Tuple, Optional
 from models import IPTVChannel
@@ -8,8 +10,11 @@ class ResumeManager:
     def __init__(self, config: Dict):
         self.config = config
         self.output_prefix = config.get('output_prefix', 'checked')
+        self.min_output_size_ratio = config.get('resume', {}).get('min_output_size_ratio', 0)
+        self._parse_cache: Dict[Tuple[str, int, int], int] = {}
+        self._dir_cache: Dict[str, Dict[str, os.DirEntry]] = {}
     
-    def should_skip_file(self, file_path: Path, working_dir: Path = None, broken_dir: Path = None) -> Tuple[bool, Optional[str]]:
+    def should_skip_file(self, file_path: Path, working_dir: Path = None, broken_dir: Path = None, use_size_hint: bool = True) -> Tuple[bool, Optional[str]]:
         """Проверяет, нужно ли пропустить файл на основе существующих выходных файлов"""
         base_name = file_path.stem
         extension = file_path.suffix
@@ -17,15 +22,21 @@ class ResumeManager:
         working_file = self._get_output_file_path(file_path, working_dir, "working", base_name, extension)
         broken_file = self._get_output_file_path(file_path, broken_dir, "broken", base_name, extension)
         
-        working_exists = working_file and working_file.exists()
-        broken_exists = broken_file and broken_file.exists()
+        working_stat = self._stat(working_file)
+        broken_stat = self._stat(broken_file)
+        working_exists = working_stat is not None
+        broken_exists = broken_stat is not None
         
         if not working_exists and not broken_exists:
             return False, None
         
         try:
-            original_channels = M3UParser.parse(str(file_path), self.config)
-            original_count = len(original_channels)
+            original_size = (self._stat(file_path) or file_path.stat()).st_size
+            output_size = sum(stat.st_size for stat in (working_stat, broken_stat) if stat)
+            if use_size_hint and output_size < self.min_output_size_ratio * original_size:
+                return False, f"Incomplete (size): {output_size}/{original_size} bytes"
+            
+            original_count = self._count_channels(file_path)
             
             if original_count == 0:
                 return False, "Original file has no channels"
@@ -34,14 +45,14 @@ class ResumeManager:
             output_files = []
             
             if working_exists:
-                working_channels = M3UParser.parse(str(working_file), self.config)
-                total_output_channels += len(working_channels)
-                output_files.append(f"working({len(working_channels)})")
+                working_count = self._count_channels(working_file, is_output=True)
+                total_output_channels += working_count
+                output_files.append(f"working({working_count})")
             
             if broken_exists:
-                broken_channels = M3UParser.parse(str(broken_file), self.config)
-                total_output_channels += len(broken_channels)
-                output_files.append(f"broken({len(broken_channels)})")
+                broken_count = self._count_channels(broken_file, is_output=True)
+                total_output_channels += broken_count
+                output_files.append(f"broken({broken_count})")
             
             if total_output_channels == original_count:
                 reason = f"Complete: {' + '.join(output_files)} = {total_output_channels}/{original_count}"
@@ -54,6 +65,52 @@ class ResumeManager:
             logging.warning(f"Error checking resume status for {file_path.name}: {e}")
             return False, f"Error checking: {e}"
     
+    def _count_channels(self, file_path: Path, is_output: bool = False) -> int:
+        """Возвращает количество каналов в файле, кэшируя результат по (путь, mtime, размер)"""
+        stat = self._stat(file_path) or file_path.stat()
+        key = (str(file_path), stat.st_mtime_ns, stat.st_size)
+        count = self._parse_cache.get(key)
+        if count is None:
+            if is_output:
+                count = M3UParser.count_channels(str(file_path))
+            else:
+                count = len(M3UParser.parse(str(file_path), self.config))
+            self._parse_cache[key] = count
+        return count
+    
+    def _list_dir(self, directory: Path) -> Dict[str, os.DirEntry]:
+        """Возвращает содержимое каталога, прочитанное одним проходом os.scandir"""
+        key = str(directory)
+        entries = self._dir_cache.get(key)
+        if entries is None:
+            try:
+                with os.scandir(directory) as iterator:
+                    entries = {entry.name: entry for entry in iterator}
+            except OSError:
+                entries = {}
+            self._dir_cache[key] = entries
+        return entries
+    
+    def _stat(self, file_path: Path) -> Optional[os.stat_result]:
+        """Возвращает stat файла из кэша каталога или None, если файла нет"""
+        entry = self._list_dir(file_path.parent).get(file_path.name)
+        if entry is None:
+            return None
+        try:
+            return entry.stat()
+        except OSError:
+            return None
+    
+    def _check_files(self, files: List[Path], working_dir: Path = None, broken_dir: Path = None) -> List[Tuple[Path, bool, Optional[str]]]:
+        """Проверяет файлы параллельно, сохраняя исходный порядок"""
+        if not files:
+            return []
+        with ThreadPoolExecutor(max_workers=min(32, len(files))) as executor:
+            return list(executor.map(
+                lambda file_path: (file_path, *self.should_skip_file(file_path, working_dir, broken_dir)),
+                files
+            ))
+    
     def _get_output_file_path(self, original_file: Path, output_dir: Path, suffix: str, base_name: str, extension: str) -> Optional[Path]:
         """Получает путь к выходному файлу"""
         if output_dir:
@@ -61,92 +118,100 @@ class ResumeManager:
         else:
             return original_file.parent / f"{self.output_prefix}_{base_name}_{suffix}{extension}"
     
-    def filter_files_for_processing(self, files: List[Path], working_dir: Path = None, broken_dir: Path = None, force: bool = False) -> Tuple[List[Path], List[Dict]]:
-        """Фильтрует файлы для обработки, исключая уже обработанные"""
-        if force:
-            return files, []
-        
+    def analyze(self, files: List[Path], working_dir: Path = None, broken_dir: Path = None, force: bool = False) -> Tuple[List[Path], List[Dict], Dict]:
+        """Один проход по файлам: список для обработки, пропущенные файлы и информация о resume"""
         files_to_process = []
         skipped_files = []
+        completed_details = []
+        incomplete_details = []
+        new_files = 0
         
-        for file_path in files:
-            should_skip, reason = self.should_skip_file(file_path, working_dir, broken_dir)
-            
+        if force:
+            files_to_process = list(files)
+            new_files = len(files)
+            checked_files = []
+        else:
+            checked_files = self._check_files(files, working_dir, broken_dir)
+        
+        for file_path, should_skip, reason in checked_files:
             if should_skip:
                 skipped_files.append({
                     'file': file_path.name,
                     'reason': reason,
                     'path': str(file_path)
                 })
-                logging.info(f"Skipping {file_path.name}: {reason}")
-            else:
-                files_to_process.append(file_path)
-                if reason:
-                    logging.info(f"Processing {file_path.name}: {reason}")
-        
-        return files_to_process, skipped_files
-    
-    def get_resume_info(self, files: List[Path], working_dir: Path = None, broken_dir: Path = None) -> Dict:
-        """Получает информацию о состоянии resume для списка файлов"""
-        total_files = len(files)
-        completed_files = 0
-        incomplete_files = 0
-        new_files = 0
-        
-        completed_details = []
-        incomplete_details = []
-        
-        for file_path in files:
-            should_skip, reason = self.should_skip_file(file_path, working_dir, broken_dir)
-            
-            if should_skip:
-                completed_files += 1
                 completed_details.append({
                     'file': file_path.name,
                     'reason': reason
                 })
-            elif reason and "Incomplete" in reason:
-                incomplete_files += 1
+                logging.info(f"Skipping {file_path.name}: {reason}")
+                continue
+            
+            files_to_process.append(file_path)
+            if reason:
+                logging.info(f"Processing {file_path.name}: {reason}")
+            if reason and "Incomplete" in reason:
                 incomplete_details.append({
                     'file': file_path.name,
-                    'reason': reason
+                    'reason': reason,
+                    'path': str(file_path)
                 })
             else:
                 new_files += 1
         
-        return {
-            'total_files': total_files,
-            'completed_files': completed_files,
-            'incomplete_files': incomplete_files,
+        resume_info = {
+            'total_files': len(files),
+            'completed_files': len(completed_details),
+            'incomplete_files': len(incomplete_details),
             'new_files': new_files,
             'completed_details': completed_details,
             'incomplete_details': incomplete_details
         }
+        return files_to_process, skipped_files, resume_info
     
-    def cleanup_incomplete_files(self, files: List[Path], working_dir: Path = None, broken_dir: Path = None) -> List[str]:
-        """Удаляет неполные выходные файлы"""
-        cleaned_files = []
-        
-        for file_path in files:
-            should_skip, reason = self.should_skip_file(file_path, working_dir, broken_dir)
+    def filter_files_for_processing(self, files: List[Path], working_dir: Path = None, broken_dir: Path = None, force: bool = False) -> Tuple[List[Path], List[Dict]]:
+        """Фильтрует файлы для обработки, исключая уже обработанные (обёртка над analyze)"""
+        files_to_process, skipped_files, _ = self.analyze(files, working_dir, broken_dir, force)
+        return files_to_process, skipped_files
+    
+    def get_resume_info(self, files: List[Path], working_dir: Path = None, broken_dir: Path = None) -> Dict:
+        """Получает информацию о состоянии resume для списка файлов (обёртка над analyze)"""
+        return self.analyze(files, working_dir, broken_dir)[2]
+    
+    def cleanup_incomplete_files(self, incomplete_details: List[Dict], working_dir: Path = None, broken_dir: Path = None) -> List[str]:
+        """Удаляет неполные выходные файлы по результатам get_resume_info"""
+        output_files = []
+        
+        for item in incomplete_details:
+            file_path = Path(item['path'])
+            if item['reason'].startswith("Incomplete (size)"):
+                _, reason = self.should_skip_file(file_path, working_dir, broken_dir, use_size_hint=False)
+                if not (reason and "Incomplete" in reason):
+                    logging.info(f"Keeping {file_path.name} outputs: {reason}")
+                    continue
+            base_name = file_path.stem
+            extension = file_path.suffix
             
-            if not should_skip and reason and "Incomplete" in reason:
-                base_name = file_path.stem
-                extension = file_path.suffix
-                
-                working_file = self._get_output_file_path(file_path, working_dir, "working", base_name, extension)
-                broken_file = self._get_output_file_path(file_path, broken_dir, "broken", base_name, extension)
-                
-                for output_file in [working_file, broken_file]:
-                    if output_file and output_file.exists():
-                        try:
-                            output_file.unlink()
-                            cleaned_files.append(str(output_file))
-                            logging.info(f"Removed incomplete file: {output_file}")
-                        except Exception as e:
-                            logging.error(f"Error removing {output_file}: {e}")
+            for suffix, output_dir in (("working", working_dir), ("broken", broken_dir)):
+                output_file = self._get_output_file_path(file_path, output_dir, suffix, base_name, extension)
+                if self._stat(output_file) is not None:
+                    output_files.append(output_file)
+        
+        with ThreadPoolExecutor(max_workers=8) as executor:
+            removed = list(executor.map(self._remove_output_file, output_files))
         
-        return cleaned_files
+        self._dir_cache.clear()
+        return [str(output_file) for output_file, ok in zip(output_files, removed) if ok]
+    
+    def _remove_output_file(self, output_file: Path) -> bool:
+        """Удаляет выходной файл, возвращает True при успехе"""
+        try:
+            output_file.unlink()
+            logging.info(f"Removed incomplete file: {output_file}")
+            return True
+        except Exception as e:
+            logging.error(f"Error removing {output_file}: {e}")
+            return False
     
     def print_resume_summary(self, resume_info: Dict, skipped_files: List[Dict]):
         """Выводит сводку о состоянии resume"""
@@ -1,30 +1,54 @@
+import asyncio
 import logging
 import sys
 import os
-from typing import List, Dict
+from typing import Dict
 from pathlib import Path
-from models import IPTVChannel
+from models import CheckStats
+try:
+    import uvloop
+    UVLOOP_AVAILABLE = True
+except ImportError:
+    UVLOOP_AVAILABLE = False
+def run_async(coro):
+    if UVLOOP_AVAILABLE:
+        if hasattr(uvloop, 'run'):
+            return uvloop.run(coro)
+        uvloop.install()
+    return asyncio.run(coro)
 def setup_logging(config: Dict, file_prefix: str = None):
+    log_to_file = config.get("log_to_file", True)
+    log_file = config.get("log_file", "iptv_checker.log")
+    log_per_file = config.get("batch_processing", {}).get("log_per_file", False)
+    show_progress_bar = config.get("show_progress_bar", True)
+    log_level = getattr(logging, config.get("log_level", "INFO"))
+    root = logging.getLogger()
     handlers = []
-    if config.get("log_to_file", True):
-        log_file = config.get("log_file", "iptv_checker.log")
-        if file_prefix and config.get("batch_processing", {}).get("log_per_file", False):
+    if log_to_file:
+        if file_prefix and log_per_file:
             log_path = Path(log_file)
             log_file = log_path.parent / f"{file_prefix}_{log_path.name}"
-        handlers.append(logging.FileHandler(log_file, encoding='utf-8'))
-    if not config.get("show_progress_bar", True):
-        handlers.append(logging.StreamHandler(sys.stdout))
-    logging.basicConfig(
-        level=getattr(logging, config.get("log_level", "INFO")),
-        format='%(asctime)s - %(levelname)s - %(message)s',
-        handlers=handlers,
-        force=True
-    )
-def print_summary(working_channels: List[IPTVChannel], broken_channels: List[IPTVChannel], 
-                 elapsed_time: float, config: Dict):
-    total = len(working_channels) + len(broken_channels)
-    working_count = len(working_channels)
-    broken_count = len(broken_channels)
+        log_file = os.path.abspath(log_file)
+        Path(log_file).parent.mkdir(parents=True, exist_ok=True)
+        file_handler = next((h for h in root.handlers if isinstance(h, logging.FileHandler) and h.baseFilename == log_file), None)
+        handlers.append(file_handler or logging.FileHandler(log_file, encoding='utf-8', delay=True))
+    if not show_progress_bar:
+        stream_handler = next((h for h in root.handlers if type(h) is logging.StreamHandler and h.stream is sys.stdout), None)
+        handlers.append(stream_handler or logging.StreamHandler(sys.stdout))
+    for handler in root.handlers[:]:
+        if handler not in handlers:
+            root.removeHandler(handler)
+            handler.close()
+    formatter = logging.Formatter('%(asctime)s - %(levelname)s - %(message)s')
+    for handler in handlers:
+        handler.setFormatter(formatter)
+        if handler not in root.handlers:
+            root.addHandler(handler)
+    root.setLevel(log_level)
+def print_summary(stats: CheckStats, elapsed_time: float, config: Dict):
+    total = stats.total
+    working_count = stats.working
+    broken_count = stats.broken
     working_percent = (working_count / total) * 100 if total > 0 else 0
     print(f"\n{'='*60}")
     print(f"IPTV CHECKER RESULTS")
@@ -35,15 +59,11 @@ def print_summary(working_channels: List[IPTVChannel], broken_channels: List[IPT
     print(f"Check duration:     {elapsed_time:.2f} seconds")
     print(f"Average per channel: {elapsed_time/total:.2f} seconds" if total > 0 else "")
     print(f"{'='*60}")
-    if config.get("show_errors_in_summary", True) and broken_channels:
-        error_stats = {}
-        for channel in broken_channels:
-            error = channel.error_message or "Unknown error"
-            error_stats[error] = error_stats.get(error, 0) + 1
+    if config.get("show_errors_in_summary", True) and broken_count:
         max_errors = config.get("max_errors_to_show", 5)
         print(f"\nTOP {max_errors} ERRORS:")
         print("-" * 30)
-        for error, count in sorted(error_stats.items(), key=lambda x: x[1], reverse=True)[:max_errors]:
+        for error, count in stats.errors.most_common(max_errors):
             percentage = (count / broken_count) * 100
             print(f"  {error}: {count} channels ({percentage:.1f}%)")
         print()
@@ -59,7 +79,8 @@ def get_file_size_mb(file_path: Path) -> float:
 def format_duration(seconds: float) -> str:
     if seconds < 60:
         return f"{seconds:.1f}s"
-    elif seconds < 3600:
-        return f"{seconds//60:.0f}m {seconds%60:.0f}s"
-    else:
-        return f"{seconds//3600:.0f}h {(seconds%3600)//60:.0f}m {seconds%60:.0f}s"
\ No newline at end of file
+    hours, rem = divmod(int(seconds), 3600)
+    minutes, secs = divmod(rem, 60)
+    if hours:
+        return f"{hours}h {minutes}m {secs}s"
+    return f"{minutes}m {secs}s"
\ No newline at end of file